@@ -41,21 +41,15 @@ Notas
 - Podés forzar la ruta usando la variable de entorno STOCK_DB.
 """
 
+import atexit
 import os
 import sqlite3
 import sys
 import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog, filedialog
+from tkinter import ttk, messagebox
+from contextlib import contextmanager
 from datetime import datetime
 import csv
-import re
-
-try:
-    import openpyxl
-    from openpyxl.styles import Font
-    import openpyxl.utils
-except Exception:
-    openpyxl = None
 
 APP_NAME = "Controlador de Stock - BG" # se cambia el nombre para personalizar
 VERSION = "1.3.0"
@@ -74,6 +68,15 @@ def _db_default_path() -> str:
 
 DB_PATH = _db_default_path()
 
+# Demora (ms) entre la última tecla en "Buscar" y la recarga de la tabla
+SEARCH_DELAY_MS = 150
+# Filas que se cargan en la tabla por tanda (el resto al hacer scroll)
+PAGE_SIZE = 200
+_NAV_KEYS = frozenset({
+    "Shift_L", "Shift_R", "Control_L", "Control_R", "Alt_L", "Alt_R",
+    "Left", "Right", "Up", "Down", "Home", "End", "Tab",
+})
+
 SCHEMA = """
 PRAGMA foreign_keys = ON;
 
@@ -101,8 +104,118 @@ CREATE TABLE IF NOT EXISTS movimientos (
 
 CREATE INDEX IF NOT EXISTS idx_productos_nombre ON productos(nombre);
 CREATE INDEX IF NOT EXISTS idx_productos_codigo ON productos(codigo);
+CREATE INDEX IF NOT EXISTS idx_productos_nombre_nocase ON productos(nombre COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_mov_prod_id ON movimientos(producto_id, id DESC);
+"""
+
+# Índice de texto completo sobre código y nombre para "Buscar"; los
+# triggers lo mantienen sincronizado con la tabla productos.
+SCHEMA_FTS = """
+CREATE VIRTUAL TABLE IF NOT EXISTS productos_fts USING fts5(
+    codigo, nombre,
+    content='productos', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+
+CREATE TRIGGER IF NOT EXISTS productos_fts_ai AFTER INSERT ON productos BEGIN
+    INSERT INTO productos_fts(rowid, codigo, nombre) VALUES (new.id, new.codigo, new.nombre);
+END;
+
+CREATE TRIGGER IF NOT EXISTS productos_fts_ad AFTER DELETE ON productos BEGIN
+    INSERT INTO productos_fts(productos_fts, rowid, codigo, nombre) VALUES ('delete', old.id, old.codigo, old.nombre);
+END;
+
+CREATE TRIGGER IF NOT EXISTS productos_fts_au AFTER UPDATE OF codigo, nombre ON productos BEGIN
+    INSERT INTO productos_fts(productos_fts, rowid, codigo, nombre) VALUES ('delete', old.id, old.codigo, old.nombre);
+    INSERT INTO productos_fts(rowid, codigo, nombre) VALUES (new.id, new.codigo, new.nombre);
+END;
+"""
+
+# Ajustes de rendimiento: WAL evita la doble escritura por commit y
+# synchronous=NORMAL ahorra un fsync por transacción.
+PRAGMAS = """
+PRAGMA journal_mode = WAL;
+PRAGMA synchronous = NORMAL;
+PRAGMA temp_store = MEMORY;
+PRAGMA mmap_size = 268435456;
+PRAGMA cache_size = -20000;
+"""
+
+# Sentencias fijas a nivel de módulo: al pasar siempre el mismo texto,
+# sqlite3 reutiliza la sentencia ya compilada de su caché.
+# Sin filtro: recorre idx_productos_nombre_nocase, sin ordenar
+_SQL_LIST_ALL = """
+SELECT id, codigo, nombre, precio, stock
+FROM productos
+ORDER BY nombre COLLATE NOCASE
+LIMIT ? OFFSET ?
+"""
+
+_SQL_COUNT_ALL = "SELECT COUNT(*) FROM productos"
+
+_SQL_LIST = """
+SELECT id, codigo, nombre, precio, stock
+FROM productos
+WHERE codigo LIKE ? OR nombre LIKE ?
+ORDER BY nombre COLLATE NOCASE
+LIMIT ? OFFSET ?
+"""
+
+_SQL_COUNT = "SELECT COUNT(*) FROM productos WHERE codigo LIKE ? OR nombre LIKE ?"
+
+_SQL_LIST_FTS = """
+SELECT p.id, p.codigo, p.nombre, p.precio, p.stock
+FROM productos_fts f
+JOIN productos p ON p.id = f.rowid
+WHERE productos_fts MATCH ?
+ORDER BY p.nombre COLLATE NOCASE
+LIMIT ? OFFSET ?
+"""
+
+_SQL_COUNT_FTS = "SELECT COUNT(*) FROM productos_fts WHERE productos_fts MATCH ?"
+
+_SQL_BY_ID = "SELECT * FROM productos WHERE id=?"
+
+_SQL_BY_CODIGO = "SELECT * FROM productos WHERE codigo=?"
+
+_SQL_INSERT_PROD = """
+INSERT INTO productos (codigo, nombre, precio, stock, barcode, creado_en, actualizado_en)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+_SQL_DELETE_PROD = "DELETE FROM productos WHERE id=?"
+
+_SQL_INSERT_MOV = """
+INSERT INTO movimientos (producto_id, tipo, cantidad, precio_unitario, nota, creado_en)
+VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+_SQL_UPD_STOCK = "UPDATE productos SET stock = stock + ?, actualizado_en=? WHERE id=?"
+
+_SQL_LIST_MOV = """
+SELECT m.id, p.codigo, p.nombre, m.tipo, m.cantidad, m.precio_unitario, m.nota, m.creado_en
+FROM movimientos m
+JOIN productos p ON p.id = m.producto_id
+ORDER BY m.id DESC
+LIMIT ?
+"""
+
+_SQL_LIST_MOV_PROD = """
+SELECT m.id, p.codigo, p.nombre, m.tipo, m.cantidad, m.precio_unitario, m.nota, m.creado_en
+FROM movimientos m
+JOIN productos p ON p.id = m.producto_id
+WHERE producto_id=?
+ORDER BY m.id DESC
+LIMIT ?
 """
 
+_COMMA_TO_DOT = bytes.maketrans(b",", b".")
+
+def _fts_query(filtro: str) -> str:
+    """'mart 12' -> '"mart"* "12"*' (todas las palabras, por prefijo)."""
+    terms = [t.replace('"', '""') for t in filtro.split() if any(ch.isalnum() for ch in t)]
+    return " ".join(f'"{t}"*' for t in terms)
+
 def now_str() -> str:
     return datetime.now().isoformat(timespec="seconds")
 
@@ -112,74 +225,115 @@ def parse_number(s: str, default=0.0) -> float:
         return float(default)
     if isinstance(s, (int, float)):
         return float(s)
-    s = str(s).strip()
-    if not s:
-        return float(default)
-    # remove currency and spaces
-    s = s.replace("$","").replace("ARS","").replace("usd","").replace("USD","").strip()
-    # keep digits and separators
-    s = re.sub(r"[^0-9\.,-]", "", s)
-    if s.count(",") and s.count("."):
-        # decide last separator as decimal
-        last_dot = s.rfind(".")
-        last_com = s.rfind(",")
+    # single pass: keep digits and separators, remembering the last of each
+    buf = bytearray()
+    last_dot = last_com = -1
+    for ch in str(s):
+        if "0" <= ch <= "9" or ch == "-":
+            buf.append(ord(ch))
+        elif ch == ".":
+            last_dot = len(buf)
+            buf.append(0x2E)
+        elif ch == ",":
+            last_com = len(buf)
+            buf.append(0x2C)
+    if last_com >= 0:
         if last_dot > last_com:
             # dot is decimal, remove commas
-            s = s.replace(",", "")
+            buf = buf.translate(None, b",")
         else:
-            # comma is decimal: remove dots and replace comma with dot
-            s = s.replace(".", "").replace(",", ".")
-    else:
-        # only one type or none
-        if s.count(",") and not s.count("."):
-            s = s.replace(",", ".")
-        # if only dots, leave as is
+            # comma is decimal (or the only separator): remove dots, comma -> dot
+            buf = buf.translate(_COMMA_TO_DOT, b".")
+    # if only dots, leave as is
     try:
-        return float(s)
-    except Exception:
+        return float(buf)
+    except ValueError:
         return float(default)
 
 class DB:
     def __init__(self, path: str):
         self.path = path
+        # Una sola conexión para toda la app (autocommit); las escrituras
+        # de varias sentencias abren su propia transacción con _tx().
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript(PRAGMAS)
+        atexit.register(self.close)
         self._ensure()
 
-    def connect(self):
-        conn = sqlite3.connect(self.path)
-        conn.row_factory = sqlite3.Row
-        return conn
+    def close(self):
+        if self._conn is None:
+            return
+        # Actualiza estadísticas del planificador solo si hace falta
+        self._conn.execute("PRAGMA optimize")
+        self._conn.close()
+        self._conn = None
+
+    @contextmanager
+    def _tx(self):
+        conn = self._conn
+        # IMMEDIATE: toma el lock de escritura al empezar, no a mitad de camino
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
 
     def _ensure(self):
-        with self.connect() as conn:
-            conn.executescript(SCHEMA)
-            # Base de datos arranca vacía - sin datos de ejemplo
+        self._conn.executescript(SCHEMA)
+        # Base de datos arranca vacía - sin datos de ejemplo
+        try:
+            existe = self._conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name='productos_fts'").fetchone()
+            self._conn.executescript(SCHEMA_FTS)
+            if not existe:
+                # Base previa al índice: indexar los productos ya cargados
+                self._conn.execute("INSERT INTO productos_fts(productos_fts) VALUES ('rebuild')")
+            self._fts = True
+        except sqlite3.OperationalError:
+            # SQLite sin FTS5: la búsqueda sigue funcionando con LIKE
+            self._fts = False
 
     # Productos
-    def listar_productos(self, filtro:str=""):
-        q = """
-        SELECT id, codigo, nombre, precio, stock
-        FROM productos
-        WHERE (? = '' OR codigo LIKE ? OR nombre LIKE ?)
-        ORDER BY nombre COLLATE NOCASE
-        """
-        like = f"%{filtro.strip()}%"
-        with self.connect() as conn:
-            return conn.execute(q, (filtro.strip(), like, like)).fetchall()
+    def _consulta_productos(self, filtro:str):
+        """Devuelve (sql_listar, sql_contar, parámetros) para el filtro."""
+        filtro = filtro.strip()
+        if not filtro:
+            return _SQL_LIST_ALL, _SQL_COUNT_ALL, ()
+        consulta = _fts_query(filtro) if self._fts else ""
+        if consulta:
+            return _SQL_LIST_FTS, _SQL_COUNT_FTS, (consulta,)
+        like = f"%{filtro}%"
+        return _SQL_LIST, _SQL_COUNT, (like, like)
+
+    def listar_productos(self, filtro:str="", limite=-1, desde=0):
+        """Tuplas (id, codigo, nombre, precio, stock); limite=-1 trae todas."""
+        q, _, args = self._consulta_productos(filtro)
+        # Solo para mostrar/exportar: tuplas simples en vez de sqlite3.Row
+        cur = self._conn.cursor()
+        cur.row_factory = None
+        return cur.execute(q, args + (limite, desde)).fetchall()
+
+    def contar_productos(self, filtro:str=""):
+        _, q, args = self._consulta_productos(filtro)
+        return self._conn.execute(q, args).fetchone()[0]
 
     def crear_producto(self, codigo, nombre, precio, stock):
-        with self.connect() as conn:
-            conn.execute(
-                "INSERT INTO productos (codigo, nombre, precio, stock, barcode, creado_en, actualizado_en) VALUES (?, ?, ?, ?, ?, ?, ?)",
-                (codigo, nombre, float(precio), int(stock), None, now_str(), now_str())
-            )
+        """Inserta el producto y devuelve su id."""
+        ts = now_str()
+        cur = self._conn.execute(
+            _SQL_INSERT_PROD,
+            (codigo, nombre, float(precio), int(stock), None, ts, ts)
+        )
+        return cur.lastrowid
 
     def obtener_producto(self, pid):
-        with self.connect() as conn:
-            return conn.execute("SELECT * FROM productos WHERE id=?", (pid,)).fetchone()
+        return self._conn.execute(_SQL_BY_ID, (pid,)).fetchone()
 
     def obtener_producto_por_codigo(self, codigo):
-        with self.connect() as conn:
-            return conn.execute("SELECT * FROM productos WHERE codigo=?", (codigo,)).fetchone()
+        return self._conn.execute(_SQL_BY_CODIGO, (codigo,)).fetchone()
 
     def actualizar_producto(self, pid, **fields):
         if not fields:
@@ -187,12 +341,10 @@ class DB:
         fields["actualizado_en"] = now_str()
         cols = ", ".join(f"{k}=?" for k in fields.keys())
         vals = list(fields.values()) + [pid]
-        with self.connect() as conn:
-            conn.execute(f"UPDATE productos SET {cols} WHERE id=?", vals)
+        self._conn.execute(f"UPDATE productos SET {cols} WHERE id=?", vals)
 
     def eliminar_producto(self, pid):
-        with self.connect() as conn:
-            conn.execute("DELETE FROM productos WHERE id=?", (pid,))
+        self._conn.execute(_SQL_DELETE_PROD, (pid,))
 
     # Movimientos
     def crear_movimiento(self, producto_id, tipo, cantidad, precio_unitario, nota=None):
@@ -200,37 +352,16 @@ class DB:
         precio_unitario = float(precio_unitario)
         if cantidad <= 0 or precio_unitario < 0:
             raise ValueError("Cantidad o precio inválidos")
-        with self.connect() as conn:
-            conn.execute("""
-                INSERT INTO movimientos (producto_id, tipo, cantidad, precio_unitario, nota, creado_en)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (producto_id, tipo, cantidad, precio_unitario, nota, now_str()))
-            mult = 1 if tipo == "IN" else -1
-            conn.execute("UPDATE productos SET stock = stock + ?, actualizado_en=? WHERE id=?",
-                         (mult * cantidad, now_str(), producto_id))
+        mult = 1 if tipo == "IN" else -1
+        ts = now_str()
+        with self._tx() as conn:
+            conn.execute(_SQL_INSERT_MOV, (producto_id, tipo, cantidad, precio_unitario, nota, ts))
+            conn.execute(_SQL_UPD_STOCK, (mult * cantidad, ts, producto_id))
 
     def listar_movimientos(self, producto_id=None, limite=500):
         if producto_id:
-            q = """
-            SELECT m.id, p.codigo, p.nombre, m.tipo, m.cantidad, m.precio_unitario, m.nota, m.creado_en
-            FROM movimientos m
-            JOIN productos p ON p.id = m.producto_id
-            WHERE producto_id=?
-            ORDER BY m.id DESC
-            LIMIT ?
-            """
-            args = (producto_id, limite)
-        else:
-            q = """
-            SELECT m.id, p.codigo, p.nombre, m.tipo, m.cantidad, m.precio_unitario, m.nota, m.creado_en
-            FROM movimientos m
-            JOIN productos p ON p.id = m.producto_id
-            ORDER BY m.id DESC
-            LIMIT ?
-            """
-            args = (limite,)
-        with self.connect() as conn:
-            return conn.execute(q, args).fetchall()
+            return self._conn.execute(_SQL_LIST_MOV_PROD, (producto_id, limite)).fetchall()
+        return self._conn.execute(_SQL_LIST_MOV, (limite,)).fetchall()
 
 
 class ProductoForm(tk.Toplevel):
@@ -238,6 +369,7 @@ class ProductoForm(tk.Toplevel):
         super().__init__(master)
         self.db = db
         self.producto = producto
+        self.producto_id = None  # id guardado, queda en None si se cancela
         self.title("Nuevo Producto" if producto is None else "Editar Producto")
         self.resizable(False, False)
         self.grab_set()
@@ -295,9 +427,10 @@ class ProductoForm(tk.Toplevel):
 
         try:
             if self.producto is None:
-                self.db.crear_producto(codigo, nombre, precio, stock)
+                self.producto_id = self.db.crear_producto(codigo, nombre, precio, stock)
             else:
                 self.db.actualizar_producto(self.producto["id"], codigo=codigo, nombre=nombre, precio=precio, stock=stock)
+                self.producto_id = self.producto["id"]
         except sqlite3.IntegrityError as e:
             messagebox.showerror("Error", f"Código duplicado.\n\n{e}")
             return
@@ -335,20 +468,22 @@ class MovimientosView(tk.Toplevel):
         self._load(producto_id)
 
     def _load(self, producto_id=None):
-        for i in self.tree.get_children():
-            self.tree.delete(i)
+        items = self.tree.get_children()
+        if items:
+            self.tree.delete(*items)
         rows = self.db.listar_movimientos(producto_id=producto_id, limite=1000)
-        for r in rows:
-            self.tree.insert("", "end", values=(
-                r["id"],
-                r["creado_en"],
-                r["codigo"],
-                r["nombre"],
-                r["tipo"],
-                r["cantidad"],
-                f"${r['precio_unitario']:,.2f}",
-                r["nota"] or ""
-            ))
+        vals = [(
+            r["id"],
+            r["creado_en"],
+            r["codigo"],
+            r["nombre"],
+            r["tipo"],
+            r["cantidad"],
+            "$" + format(r["precio_unitario"], ",.2f"),
+            r["nota"] or ""
+        ) for r in rows]
+        for v in vals:
+            self.tree.insert("", "end", values=v)
 
 
 class App(tk.Tk):
@@ -357,6 +492,10 @@ class App(tk.Tk):
         self.title(f"{APP_NAME} — v{VERSION}")
         self.geometry("1250x600")  # Tamaño intermedio para fuente de 12 puntos
         self.db = DB(DB_PATH)
+        self._last_filter = None
+        self._search_after = None
+        self._loaded = 0
+        self._total = 0
         self._setup_style()
         self._build_ui()
         self._load_table()
@@ -407,7 +546,7 @@ class App(tk.Tk):
         ttk.Label(row1, text="Buscar:").pack(side="left", padx=(0,6))
         self.e_buscar = ttk.Entry(row1, width=30)
         self.e_buscar.pack(side="left")
-        self.e_buscar.bind("<KeyRelease>", lambda e: self._load_table())
+        self.e_buscar.bind("<KeyRelease>", self._on_buscar)
         self.e_buscar.delete(0, "end")  # Asegurar que esté vacío
 
         ttk.Button(row1, text="Nuevo Producto", command=self._nuevo_producto).pack(side="left", padx=6)
@@ -432,6 +571,8 @@ class App(tk.Tk):
         self.tree.column("precio", width=150, anchor="e")
         self.tree.column("stock", width=90, anchor="e")
         self.tree.pack(fill="both", expand=True, padx=8, pady=8)
+        # Cargar la siguiente tanda al acercarse al final (rueda, teclado o scroll)
+        self.tree.configure(yscrollcommand=self._on_tree_scroll)
 
         # Barra de estado
         self.status = tk.StringVar(value=f"Base: {DB_PATH}")
@@ -442,29 +583,75 @@ class App(tk.Tk):
         self.tree.bind("<Double-1>", lambda e: self._editar_producto())
 
     def _get_selected_product_id(self):
+        # El iid de cada fila es el id del producto
         sel = self.tree.selection()
-        if not sel:
-            return None
-        item = self.tree.item(sel[0])
-        codigo = item["values"][0]
-        prod = self.db.obtener_producto_por_codigo(str(codigo))
-        return prod["id"] if prod else None
+        return int(sel[0]) if sel else None
+
+    def _on_buscar(self, event=None):
+        if event is not None and event.keysym in _NAV_KEYS:
+            return
+        # Esperar a que el usuario deje de tipear antes de consultar
+        if self._search_after:
+            self.after_cancel(self._search_after)
+        self._search_after = self.after(SEARCH_DELAY_MS, self._aplicar_filtro)
+
+    def _aplicar_filtro(self):
+        self._search_after = None
+        # Teclas que no cambian el texto (flechas, Shift...) no recargan la tabla
+        if self.e_buscar.get().strip() != self._last_filter:
+            self._load_table()
 
     def _load_table(self):
-        for i in self.tree.get_children():
-            self.tree.delete(i)
+        children = self.tree.get_children()
+        if children:
+            self.tree.delete(*children)
         filtro = self.e_buscar.get().strip()
-        rows = self.db.listar_productos(filtro=filtro)
-        total = 0
-        for r in rows:
-            total += 1
-            self.tree.insert("", "end", values=(
-                r["codigo"],
-                r["nombre"],
-                f"${r['precio']:,.2f}",
-                r["stock"],
-            ))
-        self.status.set(f"{total} productos — Base: {DB_PATH}")
+        self._last_filter = filtro
+        self._loaded = 0
+        self._total = self.db.contar_productos(filtro=filtro)
+        self._load_more()
+        self._update_status()
+
+    def _update_status(self):
+        self.status.set(f"{self._total} productos — Base: {DB_PATH}")
+
+    def _load_more(self):
+        rows = self.db.listar_productos(filtro=self._last_filter, limite=PAGE_SIZE, desde=self._loaded)
+        # Desempaquetado posicional (id, codigo, nombre, precio, stock): evita
+        # una búsqueda por nombre de columna por cada celda
+        vals = [(str(pid), (codigo, nombre, f"${precio:,.2f}", stock))
+                for pid, codigo, nombre, precio, stock in rows]
+        for iid, v in vals:
+            self.tree.insert("", "end", iid=iid, values=v)
+        self._loaded += len(vals)
+
+    @staticmethod
+    def _row_values(prod):
+        return (prod["codigo"], prod["nombre"], f"${prod['precio']:,.2f}", prod["stock"])
+
+    def _update_row(self, pid):
+        """Actualiza en el lugar la fila del producto, si está cargada."""
+        iid = str(pid)
+        if not self.tree.exists(iid):
+            return
+        prod = self.db.obtener_producto(pid)
+        if prod is None:
+            self._delete_row(pid)
+            return
+        self.tree.item(iid, values=self._row_values(prod))
+
+    def _delete_row(self, pid):
+        iid = str(pid)
+        if self.tree.exists(iid):
+            self.tree.delete(iid)
+            # Las filas siguientes corren un lugar: ajustar el OFFSET de la próxima tanda
+            self._loaded -= 1
+            self._total -= 1
+            self._update_status()
+
+    def _on_tree_scroll(self, first, last):
+        if self._loaded < self._total and float(last) > 0.9:
+            self._load_more()
 
     def _refrescar(self):
         """Refrescar la aplicación: limpiar campos y recargar tabla"""
@@ -478,7 +665,9 @@ class App(tk.Tk):
     def _nuevo_producto(self):
         dlg = ProductoForm(self, self.db, producto=None)
         self.wait_window(dlg)
-        self._load_table()
+        if dlg.producto_id is not None:
+            # Recargar: la posición del nuevo producto depende del orden y del filtro
+            self._load_table()
 
     def _editar_producto(self):
         pid = self._get_selected_product_id()
@@ -488,7 +677,15 @@ class App(tk.Tk):
         producto = self.db.obtener_producto(pid)
         dlg = ProductoForm(self, self.db, producto=producto)
         self.wait_window(dlg)
-        self._load_table()
+        if dlg.producto_id is None:
+            return
+        nuevo = self.db.obtener_producto(pid)
+        if (self._last_filter or nuevo is None
+                or nuevo["codigo"] != producto["codigo"] or nuevo["nombre"] != producto["nombre"]):
+            # Cambió la clave de orden o la coincidencia con el filtro: recargar
+            self._load_table()
+        else:
+            self._update_row(pid)
 
     def _eliminar_producto(self):
         pid = self._get_selected_product_id()
@@ -501,7 +698,7 @@ class App(tk.Tk):
         if messagebox.askyesno("Confirmar", f"¿Eliminar '{prod['nombre']}' (código {prod['codigo']})?"):
             try:
                 self.db.eliminar_producto(pid)
-                self._load_table()
+                self._delete_row(pid)
             except sqlite3.IntegrityError as e:
                 messagebox.showerror("Error", f"No se pudo eliminar.\n{e}")
 
@@ -513,6 +710,7 @@ class App(tk.Tk):
         prod = self.db.obtener_producto(pid)
         if not prod:
             return
+        from tkinter import simpledialog
         titulo = "Agregar Stock" if tipo == "IN" else "Restar Stock"
         try:
             cant = simpledialog.askinteger(titulo, "Cantidad:", minvalue=1, parent=self)
@@ -521,7 +719,7 @@ class App(tk.Tk):
             # Usar el precio actual del producto y sin nota
             precio = float(prod["precio"])
             self.db.crear_movimiento(pid, tipo, cant, precio, None)
-            self._load_table()
+            self._update_row(pid)
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
@@ -604,6 +802,7 @@ class App(tk.Tk):
     
     def _ejecutar_movimiento_escaneado(self, prod, tipo):
         """Ejecuta movimiento de stock para producto escaneado"""
+        from tkinter import simpledialog
         titulo = "Agregar Stock" if tipo == "IN" else "Restar Stock"
         try:
             cant = simpledialog.askinteger(titulo, "Cantidad:", minvalue=1, parent=self)
@@ -612,11 +811,12 @@ class App(tk.Tk):
             precio = float(prod["precio"])
             nota = "Movimiento por escaneo"
             self.db.crear_movimiento(prod["id"], tipo, cant, precio, nota)
-            self._load_table()
+            self._update_row(prod["id"])
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
     def _exportar_excel(self):
+        from tkinter import filedialog
         path = filedialog.asksaveasfilename(
             title="Exportar productos a Excel",
             defaultextension=".xlsx",
@@ -628,6 +828,15 @@ class App(tk.Tk):
 
         rows = self.db.listar_productos(filtro=self.e_buscar.get().strip())
 
+        # openpyxl se importa recién acá: no demora el arranque de la app
+        try:
+            import openpyxl
+            from openpyxl.cell import WriteOnlyCell
+            from openpyxl.styles import Font
+            from openpyxl.utils import get_column_letter
+        except Exception:
+            openpyxl = None
+
         if openpyxl is None:
             if messagebox.askyesno(
                 "openpyxl no instalado",
@@ -638,8 +847,7 @@ class App(tk.Tk):
                     with open(csv_path, "w", newline="", encoding="utf-8") as f:
                         w = csv.writer(f)
                         w.writerow(["codigo","nombre","precio","stock"])
-                        for r in rows:
-                            w.writerow([r["codigo"], r["nombre"], f"{r['precio']:.2f}", r["stock"]])
+                        w.writerows((codigo, nombre, f"{precio:.2f}", stock) for _, codigo, nombre, precio, stock in rows)
                     messagebox.showinfo("Exportación completada", f"Archivo CSV guardado en:\n{csv_path}\n\nPara .xlsx instalá:\npip install openpyxl")
                 except Exception as e:
                     messagebox.showerror("Error", f"No se pudo exportar CSV:\n{e}")
@@ -647,34 +855,39 @@ class App(tk.Tk):
 
         # Exportar a XLSX con openpyxl
         try:
-            wb = openpyxl.Workbook()
-            ws = wb.active
-            ws.title = "Productos"
+            # write_only: las filas se vuelcan al archivo sin guardar celdas en memoria
+            wb = openpyxl.Workbook(write_only=True)
+            ws = wb.create_sheet("Productos")
 
             headers = ["Código", "Nombre", "Precio Unitario", "Stock"]
-            ws.append(headers)
-            for cell in ws[1]:
-                cell.font = Font(bold=True)
 
+            # Anchos de columna sobre las tuplas que ya están en memoria: en
+            # write_only se fijan antes de escribir la primera fila.
+            # precio/stock ya vienen como REAL/INTEGER por la afinidad de las columnas
+            widths = [len(h) for h in headers]
             for r in rows:
-                ws.append([r["codigo"], r["nombre"], float(r["precio"]), int(r["stock"])])
-
-            # Formatos y anchos de columna
-            for row in ws.iter_rows(min_row=2, min_col=3, max_col=3):
-                for cell in row:
-                    cell.number_format = u'"$"#,##0.00'
-
-            for row in ws.iter_rows(min_row=2, min_col=4, max_col=4):
-                for cell in row:
-                    cell.number_format = u'#,##0'
-
-            for col in ws.columns:
-                max_len = 0
-                col_letter = openpyxl.utils.get_column_letter(col[0].column)
-                for cell in col:
-                    val = "" if cell.value is None else str(cell.value)
-                    max_len = max(max_len, len(val))
-                ws.column_dimensions[col_letter].width = min(max_len + 2, 60)
+                for i, v in enumerate(r[1:]):
+                    n = len(str(v))
+                    if n > widths[i]:
+                        widths[i] = n
+            for i, w in enumerate(widths, start=1):
+                ws.column_dimensions[get_column_letter(i)].width = min(w + 2, 60)
+
+            bold = Font(bold=True)
+            header_cells = []
+            for h in headers:
+                cell = WriteOnlyCell(ws, value=h)
+                cell.font = bold
+                header_cells.append(cell)
+            ws.append(header_cells)
+
+            # Las celdas se crean y se vuelcan fila por fila, sin acumularlas
+            for _, codigo, nombre, precio, stock in rows:
+                c_precio = WriteOnlyCell(ws, value=precio)
+                c_precio.number_format = u'"$"#,##0.00'
+                c_stock = WriteOnlyCell(ws, value=stock)
+                c_stock.number_format = u'#,##0'
+                ws.append([codigo, nombre, c_precio, c_stock])
 
             wb.save(path)
             messagebox.showinfo("Exportación completada", f"Archivo Excel guardado en:\n{path}")